@@ -1,15 +1,18 @@
-from typing import TYPE_CHECKING, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from types import SimpleNamespace
-from enum import Enum
+from enum import IntEnum
+import concurrent.futures
 import os
+import pickle
+import threading
+import weakref
+import numpy as np
 import torch
 import dataclasses
-from copy import deepcopy
-from torch.nn.utils.rnn import pad_sequence
+from copy import copy
 from dataclasses import dataclass
 from torch import nn
 import torch.distributed as dist
-from vllm.attention.backends.utils import compute_slot_mapping
 
 if TYPE_CHECKING:
     from vllm.worker.model_runner import ModelInputForGPUWithSamplingMetadata
@@ -32,19 +35,64 @@ logger = init_logger(__name__)
 
 LMCACHE_CUDA_STREAM = torch.cuda.Stream()
 
-class StoreStatus(Enum):
+# Cached engine reference so the per-step helpers skip the builder's
+# registry lookup. Set by `init_lmcache_engine`, cleared by
+# `close_lmcache_engine`.
+_CACHED_ENGINE: Optional[LMCacheEngine] = None
+
+def _get_lmcache_engine() -> Optional[LMCacheEngine]:
+    """Get the LMCache engine, bypassing the builder registry lookup.
+    """
+    global _CACHED_ENGINE
+    if _CACHED_ENGINE is None:
+        _CACHED_ENGINE = LMCacheEngineBuilder.get(ENGINE_NAME)
+    return _CACHED_ENGINE
+
+# Dedicated CPU (gloo) process group for broadcasting pickled metadata.
+# Created lazily because `torch.distributed` may not be initialized yet
+# at module import time.
+_BROADCAST_GLOO_GROUP = None
+
+# World size is fixed once the process group exists; cache it so the
+# single-GPU fast path below costs one integer compare per step.
+_WORLD_SIZE: Optional[int] = None
+
+def _get_world_size() -> int:
+    global _WORLD_SIZE
+    if _WORLD_SIZE is None:
+        if not dist.is_initialized():
+            # Don't cache: the process group may be initialized later.
+            return 1
+        _WORLD_SIZE = dist.get_world_size()
+    return _WORLD_SIZE
+
+def _get_broadcast_gloo_group():
+    """Get (or lazily create) the gloo process group used to broadcast
+    `seq_group_metadata_list`. Must be called by all ranks.
+    """
+    global _BROADCAST_GLOO_GROUP
+    if _BROADCAST_GLOO_GROUP is None:
+        _BROADCAST_GLOO_GROUP = dist.new_group(backend="gloo")
+    return _BROADCAST_GLOO_GROUP
+
+class StoreStatus(IntEnum):
     PREFILL = 1
     CHUNK_PREFILL = 2
     DECODE = 3
     SUFFIX_PREFILL = 4
     NONE = 5
 
-class RetrieveStatus(Enum):
+class RetrieveStatus(IntEnum):
     PREFILL = 1
     CHUNK_PREFILL = 2 # not last chunk
     CHUNK_PREFILL_LAST = 3
     NONE = 4
 
+# Precomputed membership set for the store inner loop; avoids a fresh
+# list allocation and linear enum compares per sequence.
+_SUFFIX_OR_CHUNK_PREFILL = frozenset(
+    {StoreStatus.SUFFIX_PREFILL, StoreStatus.CHUNK_PREFILL})
+
 SUPPORTED_MODELS = SimpleNamespace(
     llama_family = ["meta-llama/Llama-3.1-8B-Instruct"],
     longchat_family = ["lmsys/longchat-7b-16k"],
@@ -59,12 +107,24 @@ class ModelInputSubset:
     attn_layers: List[nn.Module]
     start_layer: int
     end_layer: int
-    
+    kv_cache_dtypes: List[str]
+    k_scales: List[float]
+    v_scales: List[float]
+
+
+# The model executable is identical across calls during a server's
+# lifetime, so the subset only needs to be built once per executable.
+_SUBSET_CACHE: Dict[Tuple[int, str], ModelInputSubset] = {}
 
 def create_model_input_subset(
     model_name: str,
     model_executable: "ModelInputForGPUWithSamplingMetadata",
 ) -> ModelInputSubset:
+    key = (id(model_executable), model_name)
+    cached_subset = _SUBSET_CACHE.get(key)
+    if cached_subset is not None:
+        return cached_subset
+
     if model_name in SUPPORTED_MODELS.llama_family or \
         model_name in SUPPORTED_MODELS.mistral_family:
         model = model_executable.model
@@ -96,16 +156,23 @@ def create_model_input_subset(
         model_layers=model_layers,
         attn_layers=attn_layers,
         start_layer=start_layer,
-        end_layer=end_layer
+        end_layer=end_layer,
+        # Per-layer attention attributes are static at model load, so
+        # snapshot them here instead of probing them per layer per step.
+        kv_cache_dtypes=[layer.attn.kv_cache_dtype
+                         for layer in attn_layers],
+        k_scales=[layer.attn._k_scale for layer in attn_layers],
+        v_scales=[layer.attn._v_scale for layer in attn_layers],
     )
-    
+
+    _SUBSET_CACHE[key] = model_input_subset
     return model_input_subset
 
 
 
 
 def lmcache_remove_request_id_indices(request_id):
-    engine = LMCacheEngineBuilder.get(ENGINE_NAME)
+    engine = _get_lmcache_engine()
     if engine is None:
         return
     if not engine.config.enable_blending:
@@ -134,8 +201,10 @@ def init_lmcache_engine(
         `LMCACHE_CONFIG_FILE` is not set).
     :rtype: Optional[LMCacheEngine]
     """
+    global _CACHED_ENGINE
+
     if LMCacheEngineBuilder.get(ENGINE_NAME) is not None:
-        return 
+        return
 
     config = lmcache_get_config()
     
@@ -162,6 +231,7 @@ def init_lmcache_engine(
             ENGINE_NAME,
             config,
             metadata)
+    _CACHED_ENGINE = engine
 
     return engine
 
@@ -181,30 +251,43 @@ def broadcast_seq_group_metadata(
               Broadcasted `model_input` otherwise.
     """
 
-    # broadcast len of `seq_group_metadata_list`
-    if is_driver_worker:
-        seq_group_len = [len(model_input.seq_group_metadata_list)]
-    else:
-        seq_group_len = [0]
-    dist.broadcast_object_list(seq_group_len, src=0)
-    seq_group_len = seq_group_len[0]
-    
-    # broadcast `seq_group_metadata_list`
+    # With a single GPU there is nobody to broadcast to; skip the
+    # collectives (and the gloo group creation) entirely.
+    if _get_world_size() == 1:
+        return model_input
+
+    # Pickle once on the driver and broadcast a size-prefixed CPU byte
+    # tensor on a gloo group. Compared with `broadcast_object_list`, this
+    # avoids the CPU<->GPU copies, the internal `torch.cat`, and one of the
+    # two object broadcasts.
+    gloo_group = _get_broadcast_gloo_group()
+
+    # broadcast the size of the pickled `seq_group_metadata_list`
     if is_driver_worker:
-        seq_group_metadata_list = model_input.seq_group_metadata_list
+        buf = pickle.dumps(model_input.seq_group_metadata_list, protocol=5)
+        size_tensor = torch.tensor([len(buf)], dtype=torch.long)
     else:
-        seq_group_metadata_list = [None] * seq_group_len
-    dist.broadcast_object_list(seq_group_metadata_list , src=0)
-    
+        size_tensor = torch.zeros(1, dtype=torch.long)
+    dist.broadcast(size_tensor, src=0, group=gloo_group)
+
+    # broadcast the pickled bytes in a single collective
     if is_driver_worker:
+        data_tensor = torch.frombuffer(bytearray(buf), dtype=torch.uint8)
+        dist.broadcast(data_tensor, src=0, group=gloo_group)
         return model_input
     else:
+        data_tensor = torch.empty(size_tensor.item(), dtype=torch.uint8)
+        dist.broadcast(data_tensor, src=0, group=gloo_group)
+        seq_group_metadata_list = pickle.loads(bytes(data_tensor.numpy()))
         return dataclasses.replace(model_input, seq_group_metadata_list=seq_group_metadata_list)
 
 def close_lmcache_engine() -> None:
     """Close the LMCache engine if it is initialized.
     """
     logger.debug("Closing LMCache Engine")
+    global _CACHED_ENGINE
+    _CACHED_ENGINE = None
+    _SUBSET_CACHE.clear()
     LMCacheEngineBuilder.destroy(ENGINE_NAME)
 
 def lmcache_should_retrieve(
@@ -223,13 +306,13 @@ def lmcache_should_retrieve(
 
     # model_input doesn't have seq_lens in tp
     # but attn_metadata does
-    seq_lens = model_input.attn_metadata.seq_lens
-    
-    has_engine = LMCacheEngineBuilder.get(ENGINE_NAME) is not None
+    attn_meta = model_input.attn_metadata
+    seq_lens = attn_meta.seq_lens
+
+    has_engine = _get_lmcache_engine() is not None
     if not has_engine or kv_caches is None:
         return RetrieveStatus.NONE
 
-    attn_meta = model_input.attn_metadata
     prefill_meta = attn_meta.prefill_metadata
     
     # check if the current run is profiling
@@ -259,6 +342,17 @@ def lmcache_should_retrieve(
     return RetrieveStatus.NONE
 
 
+# Shared immutable all-NONE store statuses keyed by batch size, so the
+# steady-state decode loop does not allocate a fresh list per step.
+_ALL_NONE_STATUS_CACHE: Dict[int, Tuple[StoreStatus, ...]] = {}
+
+def _all_none_store_status(num_seqs: int) -> Tuple[StoreStatus, ...]:
+    status = _ALL_NONE_STATUS_CACHE.get(num_seqs)
+    if status is None:
+        status = tuple([StoreStatus.NONE] * num_seqs)
+        _ALL_NONE_STATUS_CACHE[num_seqs] = status
+    return status
+
 def lmcache_should_store(
         model_input: "ModelInputForGPUWithSamplingMetadata", 
         kv_caches: List[torch.Tensor]) -> StoreStatus:
@@ -284,15 +378,19 @@ def lmcache_should_store(
     
         return blend_metadata.processed_layer_count > 0
 
-    seq_lens = model_input.attn_metadata.seq_lens
-    store_status = [StoreStatus.NONE] * len(seq_lens)
-    engine = LMCacheEngineBuilder.get(ENGINE_NAME)
-    has_engine = engine is not None
-    if not has_engine:
-        return store_status
+    attn_meta = model_input.attn_metadata
+    seq_lens = attn_meta.seq_lens
+    engine = _get_lmcache_engine()
+    if engine is None:
+        return _all_none_store_status(len(seq_lens))
 
+    # Fast path for the steady-state decode loop: with no prefills and
+    # decode caching disabled nothing can be stored, so skip the blend
+    # probing and the per-step list allocation.
+    if attn_meta.num_prefills == 0 and not engine.save_decode_cache:
+        return _all_none_store_status(len(seq_lens))
 
-    attn_meta = model_input.attn_metadata
+    store_status = [StoreStatus.NONE] * len(seq_lens)
     prefill_meta = attn_meta.prefill_metadata
 
     # Don't store if this request is processed by cacheblend
@@ -350,6 +448,205 @@ def lmcache_should_store(
     return store_status
 
 
+# Cache of CPU token tensors keyed (weakly) by the vLLM `SequenceData`,
+# so decoding only appends the new token ids instead of rebuilding the
+# whole tensor from the Python list every step. Accessed from both the
+# main thread and the prefetch workers, and WeakKeyDictionary is not
+# thread-safe (weakref-callback removals can interleave with lookups),
+# so every access goes through the lock.
+_TOKEN_TENSOR_CACHE = weakref.WeakKeyDictionary()
+_TOKEN_TENSOR_CACHE_LOCK = threading.Lock()
+
+def _get_full_token_tensor(seq_data, seq_len: int) -> torch.Tensor:
+    """Get the first `seq_len` token ids of `seq_data` as a CPU long tensor.
+
+    The full tensor is cached per `seq_data` and extended incrementally as
+    the sequence grows; the initial build goes through NumPy, which is
+    several times faster than `torch.tensor(list)` for long prompts.
+
+    :param seq_data: The vLLM sequence data.
+
+    :param seq_len: Number of leading tokens to return.
+    :type seq_len: int
+
+    :return: A CPU tensor with the first `seq_len` token ids.
+    """
+    try:
+        with _TOKEN_TENSOR_CACHE_LOCK:
+            cached = _TOKEN_TENSOR_CACHE.get(seq_data)
+        cacheable = True
+    except TypeError:
+        # Some SequenceData implementations are not weak-referenceable.
+        cached = None
+        cacheable = False
+
+    if cached is None or cached.numel() < seq_len:
+        token_ids = seq_data.get_token_ids()
+        # Cached tensors are never mutated in place, so building the
+        # extended tensor outside the lock is safe; concurrent builders
+        # for the same seq_data just produce the same value.
+        if cached is None:
+            full_tensor = torch.from_numpy(
+                np.asarray(token_ids, dtype=np.int64))
+        else:
+            full_tensor = torch.cat([
+                cached,
+                torch.from_numpy(
+                    np.asarray(token_ids[cached.numel():], dtype=np.int64))
+            ])
+        if cacheable:
+            with _TOKEN_TENSOR_CACHE_LOCK:
+                _TOKEN_TENSOR_CACHE[seq_data] = full_tensor
+    else:
+        full_tensor = cached
+
+    return full_tensor[:seq_len]
+
+# GPU compute capability is constant across a process; probe it once.
+_IS_TURING: Optional[bool] = None
+
+def _is_turing_gpu() -> bool:
+    global _IS_TURING
+    if _IS_TURING is None:
+        _IS_TURING = torch.cuda.get_device_capability() == (7, 5)
+    return _IS_TURING
+
+def _kv_layout_turing(kv_cache, num_heads, head_size, block_size):
+    """Reshape a Turing-layout kv_cache into `[tokens, heads, dim]`.
+
+    On Turing, kv_cache has shape
+    [num_blocks, num_heads x head_size x block_size].
+    """
+    key_cache = kv_cache[0].reshape(-1, num_heads, head_size, block_size)
+    value_cache = kv_cache[1].reshape(-1, num_heads, head_size, block_size)
+
+    key_cache = key_cache.permute(0, 3, 1, 2).reshape(-1, num_heads, head_size)
+    value_cache = value_cache.permute(0, 3, 1, 2).reshape(-1, num_heads, head_size)
+    return key_cache, value_cache
+
+def _kv_layout_default(kv_cache, num_heads, head_size, block_size):
+    """Reshape a kv_cache into `[tokens, heads, dim]` (non-Turing layout).
+    """
+    _, _, num_heads, head_size = kv_cache[0].shape
+
+    key_cache = kv_cache[0].reshape(-1, num_heads, head_size)
+    value_cache = kv_cache[1].reshape(-1, num_heads, head_size)
+    return key_cache, value_cache
+
+# Background pool that prebuilds the per-sequence CPU token tensors so
+# the retrieve path does not pay the list-to-tensor conversion on the
+# critical path. Futures are keyed by (request_id, seq_id), repopulated
+# every step by `lmcache_prefetch` and drained by `lmcache_retrieve_kv`.
+_PREFETCH_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="lmcache-prefetch")
+_PREFETCH_FUTURES: Dict[Tuple[str, int], concurrent.futures.Future] = {}
+
+def lmcache_prefetch(
+    model_input: "ModelInputForGPUWithSamplingMetadata") -> None:
+    """Kick off background builds of the per-sequence token tensors for
+    the current model_input, ahead of a potential retrieve.
+
+    :param model_input: The model input for the current request.
+    :type model_input: ModelInputForGPUWithSamplingMetadata
+    """
+    if _get_lmcache_engine() is None:
+        return
+    seq_group_metadata_list = model_input.seq_group_metadata_list
+    if seq_group_metadata_list is None:
+        return
+    # Anything left over from the previous step is stale.
+    _PREFETCH_FUTURES.clear()
+    for seq_group_metadata in seq_group_metadata_list:
+        request_id = seq_group_metadata.request_id
+        for seq_id, seq_data in seq_group_metadata.seq_data.items():
+            _PREFETCH_FUTURES[(request_id, seq_id)] = _PREFETCH_POOL.submit(
+                _get_full_token_tensor, seq_data, seq_data.get_len())
+
+# Reusable CPU bool buffer for the per-sequence token masks; grown
+# geometrically so steady-state steps allocate nothing.
+_MASK_BUF = torch.empty(0, dtype=torch.bool)
+
+def _build_token_mask(num_tokens: int, num_skip_leading: int,
+                      copy_out: bool = False) -> torch.Tensor:
+    """Build a bool mask with the first `num_skip_leading` entries False
+    and the rest True, backed by a cached module-level buffer.
+
+    Pass `copy_out=True` when the consumer may hold on to the mask beyond
+    the current call (e.g. a non-blocking `engine.store`); the buffer is
+    reused on the next call otherwise.
+    """
+    global _MASK_BUF
+    if _MASK_BUF.numel() < num_tokens:
+        _MASK_BUF = torch.empty(max(num_tokens, 2 * _MASK_BUF.numel()),
+                                dtype=torch.bool,
+                                pin_memory=torch.cuda.is_available())
+    mask = _MASK_BUF[:num_tokens]
+    mask.fill_(True)
+    mask[:num_skip_leading] = False
+    return mask.clone() if copy_out else mask
+
+def _cat_one_h2d(tensor_list: List[torch.Tensor], total_len: int,
+                 device: torch.device) -> torch.Tensor:
+    """Concatenate CPU tensor slices into one pinned staging buffer and
+    move it to `device` with a single async copy.
+    """
+    staging = torch.empty(total_len, dtype=tensor_list[0].dtype,
+                          pin_memory=(device.type == "cuda"))
+    offset = 0
+    for tensor in tensor_list:
+        staging[offset:offset + tensor.numel()].copy_(tensor)
+        offset += tensor.numel()
+    return staging.to(device, non_blocking=True)
+
+def _staged_h2d(array: np.ndarray, dtype: torch.dtype,
+                device: torch.device) -> torch.Tensor:
+    """Move a NumPy staging array to `device` with one async copy.
+    """
+    tensor = torch.from_numpy(array).to(dtype)
+    if device.type == "cuda":
+        if not tensor.is_pinned():
+            tensor = tensor.pin_memory()
+        return tensor.to(device, non_blocking=True)
+    return tensor.to(device)
+
+def _compute_slot_mapping_vec(
+    block_table: List[int],
+    seq_len: int,
+    skip_leading_tokens: int,
+    block_size: int,
+    device: torch.device,
+) -> torch.Tensor:
+    """Vectorized replacement for vLLM's `compute_slot_mapping`.
+
+    Builds the slot mapping for tokens [skip_leading_tokens, seq_len) as a
+    `torch.long` tensor with two tensor ops instead of a Python append
+    loop, and transfers it to `device` in a single copy.
+
+    :param block_table: The vLLM block table of the sequence.
+    :type block_table: List[int]
+
+    :param seq_len: The sequence length.
+    :type seq_len: int
+
+    :param skip_leading_tokens: Number of leading tokens to skip.
+    :type skip_leading_tokens: int
+
+    :param block_size: The vLLM block size.
+    :type block_size: int
+
+    :param device: The device the slot mapping will be used on.
+    :type device: torch.device
+
+    :return: The slot mapping tensor on `device`.
+    """
+    positions = torch.arange(skip_leading_tokens, seq_len, dtype=torch.long)
+    block_table_t = torch.tensor(block_table, dtype=torch.long)
+    slot_mapping = block_table_t[positions // block_size] * block_size \
+        + positions % block_size
+    if device.type == "cuda":
+        slot_mapping = slot_mapping.pin_memory().to(device, non_blocking=True)
+    return slot_mapping
+
 @_lmcache_nvtx_annotate
 def lmcache_store_kv(
     model_config: ModelConfig,
@@ -374,7 +671,7 @@ def lmcache_store_kv(
     :param store_status: Indicate whether and how KV cache of each req is stored
     :type store_status: List[StoreStatus]
     """
-    engine = LMCacheEngineBuilder.get(ENGINE_NAME)
+    engine = _get_lmcache_engine()
     assert engine is not None, "LMCache engine is not initialized."
 
     seq_lens = model_input.attn_metadata.seq_lens
@@ -384,21 +681,23 @@ def lmcache_store_kv(
     if hasattr(model_executable, "model") and \
         hasattr(model_executable.model, "start_layer"):
         start_layer = model_executable.model.start_layer
-    else:
-        start_layer = 0
-
-    # FIXME(Jiayi): ChatGLM does not have `model` or `start_layer`
-    # How does PP work in this case?
-    if hasattr(model_executable, "model") and \
-        hasattr(model_executable.model, "start_layer"):
         end_layer = model_executable.model.end_layer
     else:
+        start_layer = 0
         end_layer = len(kv_caches)
 
     # For Turing GPU
     num_heads = model_config.get_num_kv_heads(parallel_config)
     head_size = model_config.get_head_size()
-    gpu_capability = torch.cuda.get_device_capability()
+    """
+    Check the GPU architecture.
+    Some older GPUs (e.g. Turing, Volta) has different kv_caches shape
+    """
+    kv_layout_fn = _kv_layout_turing if _is_turing_gpu() else _kv_layout_default
+
+    chunk_size = engine.chunk_size
+    vllm_block_size = cache_config.block_size
+    kv_cache_device = kv_caches[0].device
 
     seq_data_idx = 0
     seq_group_metadata_list = model_input.seq_group_metadata_list
@@ -406,56 +705,83 @@ def lmcache_store_kv(
         for seqid, seq_data in seq_group_metadata.seq_data.items():
             status = store_status[seq_data_idx]
             # TODO (Jiayi): can chunk prefill and vllm prefix caching use the same logic?
-            if status in [StoreStatus.NONE]:
+            if status is StoreStatus.NONE:
                 continue
-            elif status in [StoreStatus.SUFFIX_PREFILL, StoreStatus.CHUNK_PREFILL]:
+            elif status in _SUFFIX_OR_CHUNK_PREFILL:
                 seq_len = seq_lens[seq_data_idx]
             else:
                 seq_len = seq_data.get_len()
                 if status == StoreStatus.DECODE:
-                    if seq_len % engine.chunk_size != 0:
+                    if seq_len % chunk_size != 0:
                         continue
-            current_tokens = torch.tensor(seq_data.get_token_ids()[:seq_len], device="cpu")
-            vllm_block_size = cache_config.block_size
+            current_tokens = _get_full_token_tensor(seq_data, seq_len)
             skip_leading_tokens = engine.lookup(current_tokens)
             assert skip_leading_tokens <= seq_len
             if skip_leading_tokens < seq_len:
-                assert skip_leading_tokens % engine.chunk_size == 0
-                slot_mapping = []
-                compute_slot_mapping(False, slot_mapping, seqid, seq_len, 
-                    skip_leading_tokens, 0, vllm_block_size, seq_group_metadata.block_tables)
+                assert skip_leading_tokens % chunk_size == 0
+                slot_mapping = _compute_slot_mapping_vec(
+                    seq_group_metadata.block_tables[seqid], seq_len,
+                    skip_leading_tokens, vllm_block_size, kv_cache_device)
                 kv_tuple_list = []
-                if len(slot_mapping) > 0:
-                    for layer_id in range(start_layer, end_layer):
-                        kv_cache = kv_caches[layer_id - start_layer]
-                        """
-                        Check the GPU architecture.
-                        Some older GPUs (e.g. Turing, Volta) has different kv_caches shape
-                        """
-                        if (gpu_capability == (7, 5)):
-                            # Turing. kv_cache has shape: [num_blocks, num_heads x head_size x block_size]
-                            key_cache = kv_cache[0].reshape(-1, num_heads, head_size, cache_config.block_size)
-                            value_cache = kv_cache[1].reshape(-1, num_heads, head_size, cache_config.block_size)
-
-                            key_cache = key_cache.permute(0,3,1,2).reshape(-1, num_heads, head_size)
-                            value_cache = value_cache.permute(0,3,1,2).reshape(-1, num_heads, head_size)
-                        else:
-                            _, _, num_heads, head_size = kv_cache[0].shape
-
-                            key_cache = kv_cache[0].reshape(-1, num_heads, head_size)
-                            value_cache = kv_cache[1].reshape(-1, num_heads, head_size)
-                        
-                        kv_tuple_list.append(
-                                (key_cache[slot_mapping],
-                                value_cache[slot_mapping])
-                            )
-
-                    stored_token_num = len(slot_mapping)
+                if slot_mapping.numel() > 0:
+                    num_layers = end_layer - start_layer
+                    keys_sel = None
+                    vals_sel = None
+                    # Run the gathers on the LMCache stream so they
+                    # overlap with the next step's compute on the default
+                    # stream. The wait makes the gathers see the forward
+                    # pass's writes to the paged caches.
+                    LMCACHE_CUDA_STREAM.wait_stream(
+                        torch.cuda.current_stream())
+                    with torch.cuda.stream(LMCACHE_CUDA_STREAM):
+                        for layer_id in range(start_layer, end_layer):
+                            kv_cache = kv_caches[layer_id - start_layer]
+                            key_cache, value_cache = kv_layout_fn(
+                                kv_cache, num_heads, head_size,
+                                cache_config.block_size)
+
+                            if keys_sel is None:
+                                # Gather all layers into one stacked
+                                # [num_layers, tokens, heads, dim] buffer
+                                # instead of 2 x num_layers separate
+                                # allocations. (Stacking the paged caches
+                                # themselves would copy the entire pool.)
+                                sel_shape = (num_layers,
+                                             slot_mapping.numel(),
+                                             *key_cache.shape[1:])
+                                keys_sel = torch.empty(
+                                    sel_shape,
+                                    dtype=key_cache.dtype,
+                                    device=key_cache.device)
+                                vals_sel = torch.empty_like(keys_sel)
+
+                            layer_idx = layer_id - start_layer
+                            torch.index_select(key_cache, 0, slot_mapping,
+                                               out=keys_sel[layer_idx])
+                            torch.index_select(value_cache, 0, slot_mapping,
+                                               out=vals_sel[layer_idx])
+
+                    # The non-blocking store consumes keys_sel/vals_sel
+                    # from its own thread, where the current stream is the
+                    # default one; make that stream wait for the gathers
+                    # before handing the tensors to the stream-unaware
+                    # engine (mirrors the retrieve path's event pattern).
+                    gather_event = torch.cuda.Event()
+                    gather_event.record(LMCACHE_CUDA_STREAM)
+                    torch.cuda.current_stream().wait_event(gather_event)
+
+                    kv_tuple_list = list(zip(keys_sel.unbind(0),
+                                             vals_sel.unbind(0)))
+                    stored_token_num = slot_mapping.numel()
                     skipped_token_num = seq_len - stored_token_num
-                    kv_tensors_mask = torch.ones_like(current_tokens, dtype=torch.bool)
-                    kv_tensors_mask[:skipped_token_num] = False
-                    engine.store(current_tokens.cpu(), tuple(kv_tuple_list), kv_tensors_mask,
-                                skip_existing = True, blocking = False)
+                    # `engine.store` below is non-blocking, so hand it an
+                    # owned copy of the mask buffer.
+                    kv_tensors_mask = _build_token_mask(
+                        current_tokens.numel(), skipped_token_num,
+                        copy_out=True)
+                    engine.store(current_tokens.cpu(),
+                                 tuple(kv_tuple_list), kv_tensors_mask,
+                                 skip_existing = True, blocking = False)
             else:
                 stored_token_num = 0
                 skipped_token_num = seq_len
@@ -489,19 +815,22 @@ def lmcache_retrieve_kv(
     :return: The rebuilt model_input to reflect the changes in KV.
     :return: The boolean value to indicate whether the entire execute_model should be skipped
     """
-    engine = LMCacheEngineBuilder.get(ENGINE_NAME)
+    engine = _get_lmcache_engine()
     assert engine is not None, "LMCache engine is not initialized."
     if engine.config.enable_blending:
         return model_input, False
 
-    query_start_loc = model_input.attn_metadata.query_start_loc
-    slot_mapping = model_input.attn_metadata.slot_mapping.flatten()
-    seq_lens = model_input.attn_metadata.seq_lens
+    attn_meta = model_input.attn_metadata
+    query_start_loc = attn_meta.query_start_loc
+    slot_mapping = attn_meta.slot_mapping.flatten()
+    seq_lens = attn_meta.seq_lens
 
 
     model_input_subset = create_model_input_subset(
         model_name, model_executable)
-    attn_layers = model_input_subset.attn_layers
+    kv_cache_dtypes = model_input_subset.kv_cache_dtypes
+    k_scales = model_input_subset.k_scales
+    v_scales = model_input_subset.v_scales
     start_layer = model_input_subset.start_layer
     end_layer = model_input_subset.end_layer
     
@@ -521,10 +850,11 @@ def lmcache_retrieve_kv(
     idx = 0
 
     seq_group_metadata_list = model_input.seq_group_metadata_list
+    request_ids_to_seq_ids = model_input.request_ids_to_seq_ids
 
     for seq_group_metadata in seq_group_metadata_list:
         request_id = seq_group_metadata.request_id
-        seq_ids = model_input.request_ids_to_seq_ids[request_id]
+        seq_ids = request_ids_to_seq_ids[request_id]
         for seq_id in seq_ids:
             seq_data = seq_group_metadata.seq_data[seq_id]
             is_prefill_list.append(seq_group_metadata.is_prompt)
@@ -533,7 +863,13 @@ def lmcache_retrieve_kv(
             else:
                 total_seq_len = seq_data.get_len()
             
-            full_token_tensor = torch.tensor(seq_data.get_token_ids()[:total_seq_len], device="cpu")
+            prefetch_future = _PREFETCH_FUTURES.pop(
+                (request_id, seq_id), None)
+            if prefetch_future is not None:
+                full_token_tensor = prefetch_future.result()[:total_seq_len]
+            else:
+                full_token_tensor = _get_full_token_tensor(
+                    seq_data, total_seq_len)
             full_tokens_list.append(full_token_tensor)
             
             vllm_num_required_tokens = (query_start_loc[idx + 1] - query_start_loc[idx]).item()
@@ -543,8 +879,10 @@ def lmcache_retrieve_kv(
             next_start_pos = end_pos
             start_pos_list.append(start_pos)
             
-            # TODO(Jiayi): is deepcopy avoidable here?
-            temp_block_table = deepcopy(seq_group_metadata.block_tables[seq_id])
+            # Block tables are flat lists of ints, so a slice copy is all
+            # that is needed; deepcopy would go through the generic
+            # reflection-based copier for every entry.
+            temp_block_table = list(seq_group_metadata.block_tables[seq_id])
             temp_block_table_list.append(temp_block_table)
 
             # number of tokens computed by vllm (e.g., chunk prefill, prefix caching)
@@ -552,12 +890,16 @@ def lmcache_retrieve_kv(
             
             # construct token mesk to indicate what tokens should be retrieved
             # from lmc. Tokens computed in vllm already shoudl be skipped
-            token_mask = torch.ones_like(full_token_tensor, dtype=torch.bool)
-            token_mask[:vllm_num_computed_tokens] = False
+            token_mask = _build_token_mask(full_token_tensor.numel(),
+                                           vllm_num_computed_tokens)
             
             # call lmcache retrieve
             kv_tuple, ret_token_mask = engine.retrieve(full_token_tensor, token_mask)
-            lmc_num_computed_tokens = torch.sum(ret_token_mask).item()
+            # Count on CPU: summing a GPU mask and calling `.item()` would
+            # force a device sync on the default stream per sequence.
+            if ret_token_mask.is_cuda:
+                ret_token_mask = ret_token_mask.cpu()
+            lmc_num_computed_tokens = int(ret_token_mask.count_nonzero())
             
             # total number of computed tokens (vllm + lmc)
             num_computed_tokens = vllm_num_computed_tokens + lmc_num_computed_tokens
@@ -587,20 +929,47 @@ def lmcache_retrieve_kv(
             
             # Inject the lmc retrieved kv cache
             logger.debug(f"Injected token number: {lmc_num_computed_tokens}")
+            num_layers = end_layer - start_layer
+            device = kv_caches[0].device
+            # Stack the per-layer tensors so the whole KV goes through a
+            # single H2D copy instead of one copy per layer. Stage the
+            # stacks in pinned memory and copy on `LMCACHE_CUDA_STREAM` so
+            # the transfer overlaps with compute on the default stream.
+            keys_cpu = torch.stack(
+                [kv_tuple[l][0] for l in range(num_layers)])
+            values_cpu = torch.stack(
+                [kv_tuple[l][1] for l in range(num_layers)])
+            if keys_cpu.device.type == "cpu" and not keys_cpu.is_pinned():
+                keys_cpu = keys_cpu.pin_memory()
+            if values_cpu.device.type == "cpu" and not values_cpu.is_pinned():
+                values_cpu = values_cpu.pin_memory()
+            with torch.cuda.stream(LMCACHE_CUDA_STREAM):
+                keys_gpu = keys_cpu.to(device, non_blocking=True)
+                values_gpu = values_cpu.to(device, non_blocking=True)
+            copy_event = torch.cuda.Event()
+            copy_event.record(LMCACHE_CUDA_STREAM)
+            torch.cuda.current_stream().wait_event(copy_event)
+            # The stacks were allocated on the LMCache stream but are read
+            # by default-stream kernels; tell the caching allocator so
+            # their blocks are not handed to a later copy on the LMCache
+            # stream while those kernels are still running.
+            keys_gpu.record_stream(torch.cuda.current_stream())
+            values_gpu.record_stream(torch.cuda.current_stream())
+            inject_slot_mapping = \
+                slot_mapping[start_pos:start_pos + lmc_num_computed_tokens]
             for i in range(start_layer, end_layer):
                 layer_idx = i - start_layer
                 kv_cache = kv_caches[layer_idx]
-                attn_layer = attn_layers[i]
                 key_cache, value_cache = kv_cache[0], kv_cache[1]
                 ops.reshape_and_cache_flash(
-                    kv_tuple[layer_idx][0].to(key_cache.device),
-                    kv_tuple[layer_idx][1].to(value_cache.device),
+                    keys_gpu[layer_idx],
+                    values_gpu[layer_idx],
                     key_cache,
                     value_cache,
-                    slot_mapping[start_pos:start_pos + lmc_num_computed_tokens],
-                    attn_layer.attn.kv_cache_dtype,
-                    attn_layer.attn._k_scale,
-                    attn_layer.attn._v_scale,
+                    inject_slot_mapping,
+                    kv_cache_dtypes[i],
+                    k_scales[i],
+                    v_scales[i],
                 )
             
             idx += 1
@@ -659,11 +1028,13 @@ def build_partial_prefill_input(
     rebuilt_slot_mapping = []
     rebuilt_max_query_len = 0
 
-    rebuilt_block_tables = []
-
-    rebuilt_query_start_loc = [0]
-    rebuilt_context_lens_tensor = []
-    rebuilt_selected_token_indices = []
+    # Stage the per-seq metadata in NumPy arrays filled by index so each
+    # one needs a single H2D copy at the end instead of a list-to-tensor
+    # conversion.
+    num_seqs = len(full_tokens_list)
+    rebuilt_query_start_loc = np.zeros(num_seqs + 1, dtype=np.int64)
+    rebuilt_context_lens = np.empty(num_seqs, dtype=np.int64)
+    rebuilt_selected_token_indices = np.empty(num_seqs, dtype=np.int64)
 
     last_query_start_loc = 0
 
@@ -695,57 +1066,88 @@ def build_partial_prefill_input(
         new_slot_mapping = slot_mapping_flat[start_slot_idx:end_slot_idx]
         rebuilt_slot_mapping.append(new_slot_mapping)
         rebuilt_max_query_len = max(q_len, rebuilt_max_query_len)
-        temp_block_table = temp_block_table_list[idx]
-        temp_block_table_tensor = torch.tensor(temp_block_table).to(model_input.attn_metadata.block_tables.dtype)
-        rebuilt_block_tables.append(temp_block_table_tensor)
         last_query_start_loc += q_len
-        rebuilt_query_start_loc.append(last_query_start_loc)  # start with 0
-        rebuilt_context_lens_tensor.append(num_computed_token)
+        rebuilt_query_start_loc[idx + 1] = last_query_start_loc  # start with 0
+        rebuilt_context_lens[idx] = num_computed_token
 
         # Sampling metadata related
         # seq_groups (use rebuilt query lens)
-        rebuilt_selected_token_indices.append(last_query_start_loc - 1)
+        rebuilt_selected_token_indices[idx] = last_query_start_loc - 1
 
     # rebuilt attn_metadata
-    rebuilt_attn_metadata = deepcopy(model_input.attn_metadata)
+    # A shallow copy is enough here: every field mutated below is
+    # reassigned to a new tensor, so nothing aliases the original.
+    # A deepcopy would clone every device tensor just to throw it away.
+    rebuilt_attn_metadata = copy(model_input.attn_metadata)
     rebuilt_attn_metadata.num_prefills = rebuilt_num_prefills
     rebuilt_attn_metadata.num_prefill_tokens = rebuilt_num_prefill_tokens
     rebuilt_attn_metadata.slot_mapping = torch.cat(
         rebuilt_slot_mapping).to(device)
     rebuilt_attn_metadata.max_query_len = rebuilt_max_query_len
 
-    rebuilt_attn_metadata.block_tables = pad_sequence(
-        rebuilt_block_tables,
-        batch_first=True
-        ).to(device)
-    rebuilt_attn_metadata.query_start_loc = torch.tensor(
+    # Fill one preallocated padded tensor instead of a per-seq
+    # `torch.tensor` plus `pad_sequence`, then do a single async H2D copy.
+    block_tables_dtype = model_input.attn_metadata.block_tables.dtype
+    max_blocks = max(len(block_table)
+                     for block_table in temp_block_table_list)
+    block_tables_cpu = torch.zeros(
+        (num_seqs, max_blocks),
+        dtype=block_tables_dtype,
+        pin_memory=(device.type == "cuda"))
+    for seq_idx, block_table in enumerate(temp_block_table_list):
+        block_tables_cpu[seq_idx, :len(block_table)] = \
+            torch.as_tensor(block_table, dtype=block_tables_dtype)
+    rebuilt_attn_metadata.block_tables = block_tables_cpu.to(
+        device, non_blocking=True)
+    rebuilt_attn_metadata.query_start_loc = _staged_h2d(
         rebuilt_query_start_loc,
-        dtype=model_input.attn_metadata.query_start_loc.dtype).to(device)
-    rebuilt_attn_metadata.context_lens_tensor = torch.tensor(
-        rebuilt_context_lens_tensor,
-        dtype=model_input.attn_metadata.context_lens_tensor.dtype,
-    ).to(device)
+        model_input.attn_metadata.query_start_loc.dtype, device)
+    rebuilt_attn_metadata.context_lens_tensor = _staged_h2d(
+        rebuilt_context_lens,
+        model_input.attn_metadata.context_lens_tensor.dtype, device)
 
     rebuilt_attn_metadata._cached_prefill_metadata = None
     rebuilt_sampling_metadata = None
     # rebuilt sampling_metadata
     if model_input.sampling_metadata is not None:
-        rebuilt_sampling_metadata = deepcopy(model_input.sampling_metadata)
+        rebuilt_sampling_metadata = copy(model_input.sampling_metadata)
+        if rebuilt_sampling_metadata.seq_groups is not None:
+            # Copy each group so the per-group `query_len` writes below
+            # do not alias the original sampling metadata.
+            rebuilt_sampling_metadata.seq_groups = [
+                copy(seq_group)
+                for seq_group in model_input.sampling_metadata.seq_groups
+            ]
         for idx, q_len in enumerate(rebuilt_query_lens):
             if rebuilt_sampling_metadata.seq_groups is not None:
                 rebuilt_sampling_metadata.seq_groups[idx].query_len = q_len
 
-        rebuilt_sampling_metadata.selected_token_indices = torch.tensor(
+        rebuilt_sampling_metadata.selected_token_indices = _staged_h2d(
             rebuilt_selected_token_indices,
-            dtype=model_input.sampling_metadata.selected_token_indices.dtype,
-        ).to(device)
+            model_input.sampling_metadata.selected_token_indices.dtype,
+            device)
+
+    # Tokens are CPU slices: pack them into one pinned staging buffer and
+    # issue a single H2D copy instead of one implicit copy per slice.
+    total_q = last_query_start_loc
+    rebuilt_input_tokens_tensor = _cat_one_h2d(
+        rebuilt_input_tokens, total_q, device)
+
+    # Positions are slices of `model_input.input_positions`; when that
+    # tensor already lives on `device`, cat there directly and skip the
+    # redundant transfer.
+    if model_input.input_positions.device == device:
+        rebuilt_input_positions_tensor = torch.cat(rebuilt_input_positions)
+    else:
+        rebuilt_input_positions_tensor = _cat_one_h2d(
+            rebuilt_input_positions, total_q, device)
 
     # import here to avoid circular import.
     from vllm.worker.model_runner import (
         ModelInputForGPUWithSamplingMetadata)
     rebuilt_model_input = ModelInputForGPUWithSamplingMetadata(
-        input_tokens=torch.cat(rebuilt_input_tokens).to(device),
-        input_positions=torch.cat(rebuilt_input_positions).to(device),
+        input_tokens=rebuilt_input_tokens_tensor,
+        input_positions=rebuilt_input_positions_tensor,
         seq_lens=model_input.seq_lens,
         query_lens=rebuilt_query_lens,
         lora_mapping=model_input.lora_mapping,
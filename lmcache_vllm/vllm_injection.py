@@ -14,10 +14,10 @@ from vllm.worker.model_runner_base import dump_input_when_exception
 from vllm.distributed import get_pp_group
 from vllm.transformers_utils.tokenizer import MistralTokenizer
 
-from lmcache_vllm.vllm_adapter import (init_lmcache_engine, 
+from lmcache_vllm.vllm_adapter import (init_lmcache_engine,
         lmcache_should_store, lmcache_should_retrieve,
         lmcache_store_kv, lmcache_retrieve_kv, close_lmcache_engine,
-        broadcast_seq_group_metadata,
+        broadcast_seq_group_metadata, lmcache_prefetch,
         lmcache_remove_request_id_indices, StoreStatus, RetrieveStatus,
         SUPPORTED_MODELS)
 from lmcache_vllm.lmcache_utils import lmcache_get_config
@@ -47,7 +47,11 @@ def new_execute_model(
     # TODO(Jiayi): broadcast the necessary `seq_group_metadata` in every model
     # execution. Maybe there's a more efficient way.
     model_input = broadcast_seq_group_metadata(model_input, self.is_driver_worker)
-    
+
+    # Start building the per-sequence token tensors in the background
+    # before the retrieve path needs them.
+    lmcache_prefetch(model_input)
+
     # LMCache retrieval
     retrieve_status = lmcache_should_retrieve(model_input, kv_caches)
     is_skip = False